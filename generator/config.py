@@ -1,78 +1,180 @@
 """Configuration module."""
+import functools
+import hashlib
 import logging
 import os
 import pathlib
+import pickle
 import shutil
 import subprocess
-import sys
-from typing import Any, List, Optional, Tuple, Union
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Union
 
 import click
-import colorama
-import toml
-import yaslha.block
-import yaslha.slha
 from data import GM2CalcOutput, MicromegasOutput
 
+if TYPE_CHECKING:
+    import yaslha.block
+
 logger = logging.getLogger(__name__)
-BLUE = colorama.Fore.BLUE
-RESET = colorama.Style.RESET_ALL
 PathLike = Union[str, pathlib.Path]
+_echo_lock = threading.Lock()  # keeps concurrent run_process echoes apart
+
+
+class ConfigError(click.ClickException):
+    """Raised on invalid configuration or a failed external tool.
+
+    Subclassing ClickException lets the CLI report the message and exit
+    non-zero, while long-lived callers (e.g. scans over many inputs) can
+    catch it and continue without tearing down the interpreter.
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def _which(command: str) -> Optional[str]:
+    """Memoise `shutil.which`; each call walks and stats every $PATH entry."""
+    return shutil.which(command)
+
+
+def _is_executable(path: PathLike) -> bool:
+    """Check that an already-resolved path is an executable file.
+
+    Unlike `shutil.which`, this avoids the $PATH walk entirely.
+    """
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+@functools.lru_cache(maxsize=None)
+def _ansi() -> Tuple[str, str, str]:
+    """Return (blue, dim, reset) escape codes, importing colorama lazily."""
+    import colorama
+
+    return colorama.Fore.BLUE, colorama.Style.DIM, colorama.Style.RESET_ALL
+
 
 SDECAY_IN = pathlib.Path(__file__).with_name("sdecay.in")
 SDECAY_SLHA = "SD_leshouches.in"
 SDECAY_OUT = "sdecay_slha.out"
+TOML_CACHE_DIR = pathlib.Path("~/.cache/mssm_ew").expanduser()
+
+
+def copy_file(source: PathLike, destination: PathLike) -> None:
+    """Copy a file, preferring the in-kernel copy paths.
+
+    `os.copy_file_range` (Linux, CoW-aware) is tried first, then
+    `os.sendfile`, falling back to a userspace copy with a 1 MiB buffer.
+    """
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        if hasattr(os, "copy_file_range"):
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                pass
+        if remaining > 0 and hasattr(os, "sendfile"):
+            try:
+                while remaining > 0:
+                    copied = os.sendfile(dst.fileno(), src.fileno(), None, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                pass
+        if remaining > 0:
+            shutil.copyfileobj(src, dst, length=1 << 20)
+
+
+def load_toml(config_file: PathLike) -> Any:
+    """Parse a TOML file, caching the parsed data on disk.
+
+    The cache is content-addressed by the SHA-256 of the file, so an edited
+    configuration is always re-parsed while repeated runs skip the parser.
+    """
+    data = pathlib.Path(config_file).read_bytes()
+    cache_path = TOML_CACHE_DIR / (hashlib.sha256(data).hexdigest() + ".pkl")
+    if cache_path.is_file():
+        try:
+            return pickle.loads(cache_path.read_bytes())
+        except (pickle.UnpicklingError, EOFError):
+            logger.warning(f"Broken cache {cache_path} is ignored.")
+    try:
+        import tomllib
+
+        parsed = tomllib.loads(data.decode())
+    except ModuleNotFoundError:
+        import toml
+
+        parsed = toml.loads(data.decode())
+    try:
+        TOML_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(pickle.dumps(parsed))
+    except OSError:
+        pass  # caching is best-effort; a read-only home directory is fine.
+    return parsed
 
 
 class Config:
     @staticmethod
     def run_process(command, to_print=True, **kwargs):
         # type: (List[str], bool, Any) -> Tuple[int, str]
-        logger.info(BLUE + " ".join(command) + RESET)
+        if logger.isEnabledFor(logging.INFO):
+            blue, _, reset = _ansi()
+            logger.info("%s%s%s", blue, " ".join(command), reset)
         process = subprocess.Popen(
             command,
             stdout=subprocess.PIPE,
-            bufsize=1,
-            universal_newlines=True,
+            bufsize=-1,
             **kwargs,
         )
         assert process and process.stdout
+        # the pipe stays in byte mode; decoding once at the end is cheaper
+        # than the per-chunk codec work of a text-mode wrapper.
         if to_print:
-            click.echo(colorama.Style.DIM)
-        lines: List[str] = []
-        for line in process.stdout:
-            if to_print:
-                click.echo(line, nl=False)
-            lines.append(line)
-        return_code = process.wait()
-        if to_print:
-            click.echo(RESET)
+            # drain the pipe in 64 KiB chunks (so the child never blocks on
+            # a full pipe) and echo the whole output once at the end; the
+            # lock keeps concurrent runs from interleaving on the terminal.
+            buffer = bytearray()
+            while chunk := process.stdout.read1(1 << 16):
+                buffer.extend(chunk)
+            return_code = process.wait()
+            raw = bytes(buffer)
+            _, dim, reset = _ansi()
+            with _echo_lock:
+                click.echo(dim)
+                click.echo(raw, nl=False)
+                click.echo(reset)
+        else:
+            # no streaming requested; read everything in one go.
+            raw, _ = process.communicate()
+            return_code = process.returncode
+        output = raw.decode("utf-8", errors="replace")
         if return_code != 0:
-            logger.error(f"Run failed with exit code {return_code}.")
             logger.info(process.__dict__)
-            exit()
-        return return_code, "".join(lines)
+            raise ConfigError(f"Run failed with exit code {return_code}.")
+        return return_code, output
 
     def __get_config(self, config: Any, key: str) -> str:
         """Check the value is non-empty string."""
         if (value := config.get(key)) is None:
-            logger.error(f"'{key}' is not defined in {self.config_file}")
-            sys.exit(1)
+            raise ConfigError(f"'{key}' is not defined in {self.config_file}")
         if not (isinstance(value, str) and value):
-            logger.error(f"Configuration {key}={value} is not valid.")
-            sys.exit(1)
+            raise ConfigError(f"Configuration {key}={value} is not valid.")
         return value
 
     def __init__(self, config_file: str = "config.toml") -> None:
         """Initialize the configuration."""
         self.config_file = config_file
         try:
-            config = toml.load(config_file)
+            config = load_toml(config_file)
         except FileNotFoundError:
-            logger.error(f"Configuration file not found: {config_file}")
             logger.info(f"Consider to run 'cp config.toml.example {config_file}'")
             logger.info("and edit the file to configure this package.")
-            sys.exit(1)
+            raise ConfigError(f"Configuration file not found: {config_file}")
         self.calculator = self.__get_config(config["spectrum"], "calculator")
         self.simsusy = self.__get_config(config["external"], "simsusy")
         self.gm2calc = self.__get_config(config["external"], "gm2calc")
@@ -101,17 +203,19 @@ class Config:
 
     def _setup_simsusy(self) -> None:
         """Check if simsusy is installed and executable."""
-        if shutil.which(self.simsusy) is None:
-            logger.error(f"simsusy executable '{self.simsusy}' not found. See README.")
-            exit(1)
+        if _which(self.simsusy) is None:
+            raise ConfigError(
+                f"simsusy executable '{self.simsusy}' not found. See README."
+            )
         return
 
     def _setup_gm2calc(self) -> None:
         """Check if GM2Calc executable is available."""
         self.gm2calc = str(pathlib.Path(self.gm2calc).expanduser().resolve())
-        if shutil.which(self.gm2calc) is None:
-            logger.error(f"GM2Calc executable '{self.gm2calc}' not found. See README.")
-            exit(1)
+        if not _is_executable(self.gm2calc):
+            raise ConfigError(
+                f"GM2Calc executable '{self.gm2calc}' not found. See README."
+            )
         return
 
     def _setup_micromegas(self) -> None:
@@ -123,7 +227,7 @@ class Config:
         make = self.micromegas["make"]
         directory = pathlib.Path(self.micromegas["dir"]).expanduser().resolve()
         source = pathlib.Path(self.micromegas["source"]).expanduser()
-        if shutil.which(make) is None:
+        if _which(make) is None:
             logger.error(f"Make executable '{make}' not found.")
             error = True
         if not directory.is_dir():
@@ -133,39 +237,53 @@ class Config:
             logger.error(f"Source for micrOMEGAs '{source}' not found.")
             error = True
         if error:
-            exit(1)
+            raise ConfigError("micrOMEGAs configuration is invalid.")
 
-        # compile
+        # skip the build when the source is unchanged since the last one;
+        # even a no-op `make` walks the whole micrOMEGAs tree.
         executable_path = (directory / self.micromegas["executable_name"]).resolve()
+        source_hash = hashlib.sha256(source.read_bytes()).hexdigest()
+        hash_path = executable_path.parent / f"{executable_path.name}.built-hash"
+        if (
+            _is_executable(executable_path)
+            and hash_path.is_file()
+            and hash_path.read_text().strip() == source_hash
+        ):
+            logger.info("micrOMEGAs executable is up to date; build skipped.")
+            self.micromegas_executable = (directory, executable_path)
+            return
+
+        # compile
         new_source_path = executable_path.with_suffix(source.suffix)
         command = [make, "-C", str(directory), f"main={new_source_path.name}"]
-        logger.info(
-            f"Copy {BLUE}%s{RESET} to {BLUE}%s{RESET} and compile.",
-            source,
-            new_source_path,
-        )
-        shutil.copyfile(source, new_source_path)
+        if logger.isEnabledFor(logging.INFO):
+            blue, _, reset = _ansi()
+            logger.info(
+                f"Copy {blue}%s{reset} to {blue}%s{reset} and compile.",
+                source,
+                new_source_path,
+            )
+        copy_file(source, new_source_path)
         self.run_process(command, False)
 
         # check compile
-        if shutil.which(executable_path) is None:
-            logger.error(f"Compilation of {executable_path} failed.")
-            exit(1)
+        if not _is_executable(executable_path):
+            raise ConfigError(f"Compilation of {executable_path} failed.")
+        hash_path.write_text(source_hash)
         logger.info("Compilation of micrOMEGAs code is done successfully.")
         self.micromegas_executable = (directory, executable_path)
 
     def _setup_sdecay(self) -> None:
         """Check if SDecay executable is available."""
         self.sdecay = str(pathlib.Path(self.sdecay).expanduser().resolve())
-        if shutil.which(self.sdecay) is None:
-            logger.error(f"SDecay executable '{self.sdecay}' not found. See README.")
-            exit(1)
+        if not _is_executable(self.sdecay):
+            raise ConfigError(
+                f"SDecay executable '{self.sdecay}' not found. See README."
+            )
         if not SDECAY_IN.is_file():
-            logger.error(f"SDecay input file '{SDECAY_IN}' not found.")
-            exit(1)
+            raise ConfigError(f"SDecay input file '{SDECAY_IN}' not found.")
         if SDECAY_IN.read_text().find("SDECAY INPUT FILE") == -1:
-            logger.error(f"SDecay input file '{SDECAY_IN}' seems invalid.")
-            exit(1)
+            raise ConfigError(f"SDecay input file '{SDECAY_IN}' seems invalid.")
         return
 
     def run_simsusy(self, *args: PathLike) -> None:
@@ -176,8 +294,7 @@ class Config:
     def run_micromegas(self, slha1: pathlib.Path) -> MicromegasOutput:
         """Run micrOMEGAs."""
         if self.micromegas_executable is None:
-            logger.error("micrOMEGAs is not configured.")
-            exit(1)
+            raise ConfigError("micrOMEGAs is not configured.")
         command = [str(self.micromegas_executable[1]), str(slha1.resolve())]
 
         _, output = self.run_process(
@@ -189,25 +306,39 @@ class Config:
     def run_gm2calc(self, slha1: pathlib.Path) -> GM2CalcOutput:
         """Run GM2Calc."""
         _, version = self.run_process([self.gm2calc, "--version"])
-        original_input = yaslha.parse_file(slha1)
-        original_input["GM2CalcConfig", 0] = 1  # request "DETAILED" output
-        yaslha.dump_file(original_input, slha1.with_suffix(".gm2in"))
-        command = [self.gm2calc, f"--slha-input-file={slha1.with_suffix('.gm2in')}"]
+        # the input is the SLHA1 file plus one configuration block, so append
+        # it as text instead of round-tripping the file through yaslha.
+        gm2calc_input = slha1.with_suffix(".gm2in")
+        copy_file(slha1, gm2calc_input)
+        with open(gm2calc_input, "a") as f:
+            f.write("Block GM2CalcConfig\n    0    1    # DETAILED output\n")
+        command = [self.gm2calc, f"--slha-input-file={gm2calc_input}"]
         _, output = self.run_process(command)
         return GM2CalcOutput(output, version)
 
     def run_sdecay(
         self, slha1: pathlib.Path
-    ) -> Tuple[yaslha.block.InfoBlock, List[yaslha.block.Decay]]:
-        """Run SDecay."""
-        shutil.copyfile(slha1, SDECAY_SLHA)
-        # add dummy block, otherwise SDecay complains.
-        with open(SDECAY_SLHA, "a") as f:
-            f.write("Block DUMMY #\n     1     0.00000000E+00   #\n")
-        self.run_process([self.sdecay])
-        result = yaslha.parse_file(SDECAY_OUT)
-        os.remove(SDECAY_SLHA)
-        shutil.move(SDECAY_OUT, slha1.with_suffix(".sdecay_raw"))
+    ) -> "Tuple[yaslha.block.InfoBlock, List[yaslha.block.Decay]]":
+        """Run SDecay.
+
+        SDecay reads and writes fixed file names in its working directory, so
+        each call runs in its own temporary directory; this allows concurrent
+        invocations without racing on `SD_leshouches.in`/`sdecay_slha.out`.
+        """
+        import yaslha
+
+        work_dir = pathlib.Path(tempfile.mkdtemp(prefix="sdecay."))
+        try:
+            copy_file(SDECAY_IN, work_dir / SDECAY_IN.name)
+            copy_file(slha1, work_dir / SDECAY_SLHA)
+            # add dummy block, otherwise SDecay complains.
+            with open(work_dir / SDECAY_SLHA, "a", buffering=1 << 16) as f:
+                f.write("Block DUMMY #\n     1     0.00000000E+00   #\n")
+            self.run_process([self.sdecay], cwd=work_dir)
+            result = yaslha.parse_file(work_dir / SDECAY_OUT)
+            shutil.move(work_dir / SDECAY_OUT, slha1.with_suffix(".sdecay_raw"))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
         dcinfo = result["DCINFO"]
         decays = list(result.decays.values())
         dcinfo.head.pre_comment = ["#"]
@@ -217,8 +348,7 @@ class Config:
 
     def convert_to_sinderin(self, slha2: pathlib.Path) -> None:
         if self.sinderin is None:
-            logger.error("Sinderin is not configured.")
-            exit(1)
+            raise ConfigError("Sinderin is not configured.")
         command = ["python", *self.sinderin, str(slha2)]
         _, output = self.run_process(command, False)
         with open(slha2.with_suffix(".sinderin"), "w") as f:
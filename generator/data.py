@@ -1,8 +1,10 @@
+import functools
 import logging
 import re
-from typing import Dict, List, TypeVar
+from typing import TYPE_CHECKING, Dict, List, Pattern, Tuple, TypeVar
 
-import yaslha.block
+if TYPE_CHECKING:
+    import yaslha.block
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T")
@@ -10,8 +12,10 @@ T = TypeVar("T")
 
 def check_result(title, match: List[T]) -> T:
     if len(match) == 0:
-        logger.error(f"Cannot find {title} in micrOMEGAs output.")
-        exit(1)
+        # imported lazily: config imports this module at its top level.
+        from config import ConfigError
+
+        raise ConfigError(f"Cannot find {title} in micrOMEGAs output.")
     elif len(match) > 1:
         logger.warning(f"Multiple {title} found in output; first is used.")
     return match[0]
@@ -19,16 +23,31 @@ def check_result(title, match: List[T]) -> T:
 
 class MicromegasOutput:
     NUM = r"([-+]?(?:\d*\.\d+|\d+)(?:[eEdD][-+]?\d+)?)"
-    RE_OMEGA = re.compile(r"relic density.*$\s+^.*Omega\s*=\s*" + NUM, re.M)
-    RE_PROTON = re.compile(r"\s+".join(["proton", "SI", NUM, "SD", NUM]), re.M)
-    RE_NEUTRON = re.compile(r"\s+".join(["neutron", "SI", NUM, "SD", NUM]), re.M)
+
+    # The patterns are compiled lazily so that importing this module (or using
+    # only one of the output classes) does not pay the re.compile cost.
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _re_omega(cls) -> Pattern[str]:
+        return re.compile(rf"relic density.*$\s+^.*Omega\s*=\s*{cls.NUM}", re.M)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _re_proton(cls) -> Pattern[str]:
+        return re.compile(rf"proton\s+SI\s+{cls.NUM}\s+SD\s+{cls.NUM}")
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _re_neutron(cls) -> Pattern[str]:
+        return re.compile(rf"neutron\s+SI\s+{cls.NUM}\s+SD\s+{cls.NUM}")
 
     @classmethod
     def parse_output(cls, output: str) -> Dict[str, float]:
         """Parse micromegas output."""
-        omega = check_result("omega_DM", cls.RE_OMEGA.findall(output))
-        proton = check_result("proton", cls.RE_PROTON.findall(output))
-        neutron = check_result("proton", cls.RE_NEUTRON.findall(output))
+        omega = check_result("omega_DM", cls._re_omega().findall(output))
+        proton = check_result("proton", cls._re_proton().findall(output))
+        neutron = check_result("proton", cls._re_neutron().findall(output))
         return {
             "omega_h2": float(omega),
             "proton_si": float(proton[0]),
@@ -45,8 +64,10 @@ class MicromegasOutput:
         self.neutron_si = result["neutron_si"]  # [pb]
         self.neutron_sd = result["neutron_sd"]  # [pb]
 
-    def to_slha_block(self, block_name: str = "DM") -> yaslha.block.Block:
+    def to_slha_block(self, block_name: str = "DM") -> "yaslha.block.Block":
         """Convert to SLHA block."""
+        import yaslha.block
+
         block = yaslha.block.Block(block_name)
         block.head.comment = "calculated by micrOMEGAs"
         # Motoi's convention?
@@ -65,33 +86,57 @@ class MicromegasOutput:
 
 class GM2CalcOutput:
     NUM = r"([-+]?(?:\d*\.\d+|\d+)[eE][-+]?\d+)"
-    RE_2L = re.compile(
-        r"amu \(1-loop \+ 2-loop best\)\s*=\s*" + NUM + r"\s*\+-\s*" + NUM
-    )
-    RE_START_WITH_ALPHA_NUM = re.compile(r"^\w")
-    RE_NUM_LINE = re.compile(r"^\s*" + NUM)
-    RE_NORMAL_LINE = re.compile(r"^\s*(.+?)\s+" + NUM)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _re_2l(cls) -> Pattern[str]:
+        return re.compile(
+            rf"amu \(1-loop \+ 2-loop best\)\s*=\s*{cls.NUM}\s*\+-\s*{cls.NUM}"
+        )
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _re_num_line(cls) -> Pattern[str]:
+        return re.compile(rf"^\s*{cls.NUM}")
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _re_normal_line(cls) -> Pattern[str]:
+        return re.compile(rf"^\s*(.+?)\s+{cls.NUM}")
 
     @classmethod
     def parse_output(cls, output: str) -> Dict[str, float]:
         """Parse GM2Calc output."""
-        # get the 2-loop value
-        best_value = check_result("1L+2L", cls.RE_2L.findall(output))
-        # collect blocks
+        # one pass over the lines; cheap str checks guard each regex so the
+        # output is traversed (and each line matched) only once.
+        best_values: List[Tuple[str, str]] = []
         blocks: Dict[str, Dict[str, float]] = {}
         tag = ""
-        for line in output.split("\n"):
-            if cls.RE_START_WITH_ALPHA_NUM.match(line):
+        for line in output.splitlines():
+            if not line:
+                continue
+            # the 2L best line may be indented, so detect it independently
+            # of the column-0 tag check below.
+            if "amu (1-loop + 2-loop best)" in line and (
+                match := cls._re_2l().search(line)
+            ):
+                best_values.append((match[1], match[2]))
+            if line[0].isalnum() or line[0] == "_":
                 tag = re.sub(r"[^A-Z0-9 ]", "", line.strip().upper())
                 blocks[tag] = {}
-            elif tag and (match := cls.RE_NUM_LINE.match(line)):
+            elif not tag:
+                continue
+            elif line.lstrip()[:1] in "+-0123456789." and (
+                match := cls._re_num_line().match(line)
+            ):
                 blocks[tag]["NO KEY"] = float(match[1])
-            elif tag and (match := cls.RE_NORMAL_LINE.match(line)):
+            elif match := cls._re_normal_line().match(line):
                 blocks[tag][match[1]] = float(match[2])
+        best_value = check_result("1L+2L", best_values)
 
         result: Dict[str, float] = {}
-        result["1L+2L"] = best_value[0]
-        result["1L+2L_unc"] = best_value[1]
+        result["1L+2L"] = float(best_value[0])
+        result["1L+2L_unc"] = float(best_value[1])
         result["1L"] = blocks["FULL 1L WITH TANBETA RESUMMATION"]["sum"]
         result["1L_no_resum"] = blocks["FULL 1L WITHOUT TANBETA RESUMMATION"]["NO KEY"]
         result["WHN"] = blocks["1L APPROXIMATION WITH TANBETA RESUMMATION"]["W-H-nu"]
@@ -120,8 +165,10 @@ class GM2CalcOutput:
         self.data = self.parse_output(output_lines)
         self.version = version
 
-    def to_slha_block(self, block_name: str = "GM2") -> yaslha.block.Block:
+    def to_slha_block(self, block_name: str = "GM2") -> "yaslha.block.Block":
         """Convert to SLHA block."""
+        import yaslha.block
+
         block = yaslha.block.Block(block_name)
         block.head.comment = f"calculated by GM2Calc v{self.version}"
         convention = [
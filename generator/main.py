@@ -1,13 +1,13 @@
 #!python
 """Scripts of this package."""
 
+import concurrent.futures
 import logging
 import pathlib
+from typing import List
 
 import click
-import coloredlogs
-import yaslha
-from config import Config
+from config import Config, ConfigError
 
 logger = logging.getLogger(__name__)
 
@@ -26,29 +26,58 @@ def message(message: str) -> None:
 
 def run(config: Config, input_path: pathlib.Path) -> None:
     """Calculate everything."""
+    import yaslha
+
     message("Generate spectrum by SimSUSY (SLHA1 and SLHA2)")
     slha1_path = pathlib.Path(".") / input_path.with_suffix(".slha1").name
     slha2_path = pathlib.Path(".") / input_path.with_suffix(".slha2").name
     config.run_simsusy(input_path, slha2_path)
     config.run_simsusy("--v1", input_path, slha1_path)
-    # micromegas and gm2calc
-    micromegas = config.run_micromegas(slha1_path)
-    gm2calc = config.run_gm2calc(slha1_path)
-    dcinfo, decays = config.run_sdecay(slha1_path)
-    # dump
-    slha2 = yaslha.parse_file(slha2_path)
-    slha2.add_block(micromegas.to_slha_block())
-    slha2.add_block(gm2calc.to_slha_block())
-    slha2.add_block(dcinfo)
+    # micromegas, gm2calc, and sdecay are independent external processes,
+    # so run them concurrently; wall-clock time is the slowest of the three.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        micromegas_future = executor.submit(config.run_micromegas, slha1_path)
+        gm2calc_future = executor.submit(config.run_gm2calc, slha1_path)
+        sdecay_future = executor.submit(config.run_sdecay, slha1_path)
+        micromegas = micromegas_future.result()
+        gm2calc = gm2calc_future.result()
+        dcinfo, decays = sdecay_future.result()
+    # dump: the SimSUSY output is untouched, so append the new blocks to it
+    # instead of parsing and re-serialising the whole spectrum file.
+    extra = yaslha.slha.SLHA()
+    extra.add_block(micromegas.to_slha_block())
+    extra.add_block(gm2calc.to_slha_block())
+    extra.add_block(dcinfo)
     for d in decays:
-        slha2.add_block(d)
-    yaslha.dump_file(
-        slha2, slha2_path, comments_preserve=yaslha.dumper.CommentsPreserve.ALL
-    )
+        extra.add_block(d)
+    with open(slha2_path, "a") as f:
+        f.write(
+            yaslha.dump(extra, comments_preserve=yaslha.dumper.CommentsPreserve.ALL)
+        )
     # convert to sinderin
     config.convert_to_sinderin(slha2_path)
 
 
+def main_many(
+    inputs: List[pathlib.Path], config_file: str = CONFIG_FILE
+) -> List[pathlib.Path]:
+    """Calculate spectra for many input files with a single configuration.
+
+    The configuration (TOML parse, micrOMEGAs build, executable checks) is
+    set up once; a failure on one input is reported and the scan continues.
+    Returns the inputs that failed.
+    """
+    config = Config(config_file=config_file)
+    failed: List[pathlib.Path] = []
+    for input_path in inputs:
+        try:
+            run(config, input_path)
+        except ConfigError as e:
+            logger.error(f"{input_path}: {e.format_message()}")
+            failed.append(input_path)
+    return failed
+
+
 @click.command(context_settings={"help_option_names": ["-h", "--help"]})
 @click.option(
     "-c",
@@ -61,6 +90,8 @@ def run(config: Config, input_path: pathlib.Path) -> None:
 @click.version_option(__version__, "-V", "--version", prog_name=__pkgname__)
 def main(**args: str) -> None:
     """Handle SLHA format data."""
+    import coloredlogs
+
     coloredlogs.install(logger=logging.getLogger(), fmt="%(levelname)8s %(message)s")
     message("Configuration")
     config = Config(config_file=args.get("c", CONFIG_FILE))